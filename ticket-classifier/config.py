@@ -16,10 +16,24 @@ class Config:
     # Endee Vector Database Settings
     ENDEE_BASE_URL = os.getenv('ENDEE_BASE_URL', 'http://localhost:8080')
     ENDEE_AUTH_TOKEN = os.getenv('ENDEE_AUTH_TOKEN', '')
+    ENDEE_POOL_SIZE = int(os.getenv('ENDEE_POOL_SIZE', '64'))  # Max pooled connections per host
+    ENDEE_INSERT_BATCH_SIZE = int(os.getenv('ENDEE_INSERT_BATCH_SIZE', '5000'))  # Vectors per bulk insert request
+    ENDEE_INSERT_WORKERS = int(os.getenv('ENDEE_INSERT_WORKERS', '4'))  # Concurrent bulk insert requests
+    ENDEE_VECTOR_DECIMALS = int(os.getenv('ENDEE_VECTOR_DECIMALS', '4'))  # Digits kept per component on insert
     
     # Embedding Model Settings
     EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'sentence-transformers/all-MiniLM-L6-v2')
     EMBEDDING_DIMENSION = 384  # Dimension for all-MiniLM-L6-v2
+    EMBEDDING_BACKEND = os.getenv('EMBEDDING_BACKEND', 'torch')  # 'torch', 'onnx' or 'openvino'
+    EMBEDDING_MODEL_FILE = os.getenv('EMBEDDING_MODEL_FILE', '')  # e.g. onnx/model_qint8_avx512_vnni.onnx
+    EMBEDDING_NON_BLOCKING = os.getenv('EMBEDDING_NON_BLOCKING', 'False').lower() == 'true'  # Async host-to-GPU copies
+    PRELOAD_EMBEDDING_MODEL = os.getenv('PRELOAD_EMBEDDING_MODEL', 'False').lower() == 'true'
+    EMBEDDING_CACHE_SIZE = int(os.getenv('EMBEDDING_CACHE_SIZE', '10000'))  # Max cached query embeddings
+    EMBEDDING_CACHE_PRECISION = os.getenv('EMBEDDING_CACHE_PRECISION', 'int8')  # 'int8' or 'float16'
+    EMBEDDING_SHARED_CACHE = os.getenv('EMBEDDING_SHARED_CACHE', '')  # Django cache alias shared by workers, e.g. 'default'
+    EMBEDDING_SHARED_CACHE_SECONDS = int(os.getenv('EMBEDDING_SHARED_CACHE_SECONDS', '3600'))
+    EMBEDDING_TOKEN_BUDGET = int(os.getenv('EMBEDDING_TOKEN_BUDGET', '8192'))  # Padded tokens per bulk-encode batch
+    EMBEDDING_CONCURRENCY = int(os.getenv('EMBEDDING_CONCURRENCY', '2'))  # Bulk-encode batches in flight
     
     # Django Settings
     DJANGO_SECRET_KEY = os.getenv('DJANGO_SECRET_KEY', 'change-me-in-production')
@@ -28,6 +42,8 @@ class Config:
     # Classification Settings
     TOP_K_SIMILAR = 5  # Number of similar tickets to retrieve
     CONFIDENCE_THRESHOLD = 0.6  # Minimum confidence for classification
+    TICKET_CACHE_REFRESH_SECONDS = int(os.getenv('TICKET_CACHE_REFRESH_SECONDS', '60'))  # 0 disables reload checks
+    CLASSIFICATION_WORKERS = int(os.getenv('CLASSIFICATION_WORKERS', '2'))  # Background classification threads
     
     # Index Settings
     INDEX_NAME = 'support_tickets'
@@ -3,15 +3,142 @@ Ticket Classifier - Main classification logic.
 Uses Endee vector database for semantic similarity search.
 """
 
-from typing import List, Dict, Tuple
+from typing import List, Dict, Iterable, Iterator, NamedTuple, Optional, Tuple
+import numpy as np
 import pandas as pd
+import hashlib
 import os
-from collections import Counter
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 from core.endee_client import EndeeClient
 from core.embedding_service import get_embedding_service
 from config import config
 
+__all__ = ['TicketClassifier', 'get_classifier']
+
+# Candidate column names, in priority order, for the training CSV
+CATEGORY_COLUMNS = ['Ticket Type', 'Category', 'Type', 'Issue Type', 'Topic']
+TEXT_COLUMNS = ['Ticket Subject', 'Subject', 'Ticket Description', 'Description']
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TRAIN_CSV_PATH = os.path.join(BASE_DIR, 'data', 'processed', 'train.csv')
+TRAIN_CACHE_PATH = os.path.join(BASE_DIR, 'data', 'processed', 'train.cache.npz')
+
+# Bump when _parse_training_csv or the cache file layout changes
+CACHE_FORMAT_VERSION = 2
+
+
+def _cache_format_key() -> str:
+    """Identify the parse logic and column lists a cache file was built with."""
+    columns = '\x1f'.join(CATEGORY_COLUMNS) + '\x1e' + '\x1f'.join(TEXT_COLUMNS)
+    digest = hashlib.blake2b(columns.encode('utf-8'), digest_size=8).hexdigest()
+    return f"{CACHE_FORMAT_VERSION}:{digest}"
+
+
+class _TicketCache(NamedTuple):
+    """
+    Metadata for the indexed training tickets, kept as parallel arrays.
+    
+    ``id_to_row`` maps an Endee vector id to a row, ``cat_codes`` holds an
+    integer code per row into ``categories_vocab``, and ``texts`` holds the
+    display text per row.
+    """
+    id_to_row: Dict[str, int]
+    categories_vocab: List[str]
+    cat_codes: np.ndarray
+    texts: np.ndarray
+    
+    @classmethod
+    def empty(cls) -> '_TicketCache':
+        return cls({}, [], np.empty(0, dtype=np.int16), np.empty(0, dtype=object))
+
+
+def _vote_numpy(cat_codes: np.ndarray, scores: np.ndarray, num_cats: int) -> Tuple[int, float, np.ndarray, np.ndarray]:
+    """
+    Weighted category vote over the hits of one query.
+    
+    Args:
+        cat_codes: Category code of each hit
+        scores: Similarity score of each hit
+        num_cats: Size of the category vocabulary
+        
+    Returns:
+        Tuple of (best code, confidence, per-category weights, per-category hit mask)
+    """
+    weights = np.bincount(cat_codes, weights=scores, minlength=num_cats)
+    seen = np.bincount(cat_codes, minlength=num_cats) > 0
+    
+    # Highest weighted score; ties go to the category of the closest hit
+    hit_weights = weights[cat_codes]
+    best = int(cat_codes[np.argmax(hit_weights == hit_weights.max())])
+    total = weights.sum()
+    confidence = weights[best] / total if total > 0 else 0.0
+    return best, float(confidence), weights, seen
+
+
+def _vote_fused(cat_codes, scores, num_cats):
+    """Fused-loop version of ``_vote_numpy``, compiled with Numba by ``_get_vote``."""
+    weights = np.zeros(num_cats)
+    seen = np.zeros(num_cats, dtype=np.bool_)
+    total = 0.0
+    for i in range(cat_codes.shape[0]):
+        code = cat_codes[i]
+        weights[code] += scores[i]
+        seen[code] = True
+        total += scores[i]
+    
+    top = -np.inf
+    for code in range(num_cats):
+        if seen[code] and weights[code] > top:
+            top = weights[code]
+    best = -1
+    for i in range(cat_codes.shape[0]):
+        if weights[cat_codes[i]] == top:
+            best = cat_codes[i]
+            break
+    confidence = weights[best] / total if total > 0 else 0.0
+    return best, confidence, weights, seen
+
+
+_vote = None
+_vote_lock = threading.Lock()
+
+
+def _get_vote():
+    """
+    Return the vote kernel, building it on first use.
+    
+    Numba is imported here rather than at module import so processes that
+    never classify (management commands, the dashboard) don't pay for it.
+    
+    Returns:
+        The Numba-compiled ``_vote_fused`` if Numba is installed, else ``_vote_numpy``
+    """
+    global _vote
+    if _vote is None:
+        with _vote_lock:
+            if _vote is None:
+                try:
+                    import numba
+                except ImportError:
+                    _vote = _vote_numpy
+                else:
+                    _vote = numba.njit(cache=True)(_vote_fused)
+    return _vote
+
+
+def _warm_vote():
+    """
+    Run the vote kernel once on a one-hit input with the dtypes used at query time.
+    
+    With Numba this compiles the kernel, or loads it from the on-disk cache,
+    up front instead of on the first classification request.
+    """
+    _get_vote()(np.zeros(1, dtype=np.int16), np.ones(1, dtype=np.float64), 1)
+
 
 class TicketClassifier:
     """Classifier for support tickets using vector similarity."""
@@ -28,44 +155,147 @@ class TicketClassifier:
         self.embedding_service = get_embedding_service()
         self.top_k = config.TOP_K_SIMILAR
         self.confidence_threshold = config.CONFIDENCE_THRESHOLD
+        self._ticket_cache = _TicketCache.empty()
+        self._cache_signature = None
         self._load_ticket_cache()
+        _warm_vote()
+        
+        self.refresh_interval = config.TICKET_CACHE_REFRESH_SECONDS
+        if self.refresh_interval > 0:
+            threading.Thread(target=self._maybe_refresh, daemon=True).start()
         
-    def _load_ticket_cache(self):
-        """Load training data into memory for metadata lookup (workaround for Endee metadata issue)."""
+    @staticmethod
+    def _csv_signature(csv_path: str) -> Optional[Tuple[int, int]]:
+        """Return (mtime_ns, size) of the training CSV, or None if it is missing."""
         try:
-            
-            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            csv_path = os.path.join(base_dir, 'data', 'processed', 'train.csv')
-            
-            self.ticket_cache = {}
-            if os.path.exists(csv_path):
-                df = pd.read_csv(csv_path)
-                for idx, row in df.iterrows():
-                    # Extract category (check multiple possible column names)
-                    category = 'Unknown'
-                    for col in ['Ticket Type', 'Category', 'Type', 'Issue Type', 'Topic']:
-                        if col in row and pd.notna(row[col]):
-                            category = str(row[col])
-                            break
-                    
-                    # Combine text for display
-                    text_parts = []
-                    for col in ['Ticket Subject', 'Subject', 'Ticket Description', 'Description']:
-                        if col in row and pd.notna(row[col]):
-                            text_parts.append(str(row[col]))
-                    combined_text = " | ".join(text_parts)
-                    
-                    self.ticket_cache[f"ticket_{idx}"] = {
-                        "category": category,
-                        "text": combined_text
-                    }
-                print(f"Loaded {len(self.ticket_cache)} tickets into metadata cache")
-            else:
+            stat = os.stat(csv_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def _load_ticket_cache(self, keep_previous: bool = False):
+        """
+        Load training data into memory for metadata lookup (workaround for Endee metadata issue).
+        
+        The parsed arrays are persisted next to the CSV and reused as long as
+        the CSV's mtime and size are unchanged.
+        
+        Args:
+            keep_previous: Keep the current cache if the CSV is missing, fails
+                to parse or changes while it is being read
+        """
+        csv_path = TRAIN_CSV_PATH
+        signature = self._csv_signature(csv_path)
+        try:
+            if signature is None:
                 print(f"Warning: Training data not found at {csv_path}")
+                if not keep_previous:
+                    self._ticket_cache = _TicketCache.empty()
+                self._cache_signature = signature
+                return
+            
+            cache = self._read_cache_file(TRAIN_CACHE_PATH, signature)
+            if cache is None:
+                cache = self._parse_training_csv(csv_path)
+                if self._csv_signature(csv_path) != signature:
+                    # Still being written; leave the signature so the next pass retries
+                    print(f"Training data at {csv_path} changed while loading, skipping reload")
+                    return
+                self._write_cache_file(TRAIN_CACHE_PATH, signature, cache)
+            self._ticket_cache = cache
+            self._cache_signature = signature
+            print(f"Loaded {len(cache.id_to_row)} tickets into metadata cache")
         except Exception as e:
-            self.ticket_cache = {}
+            if not keep_previous:
+                self._ticket_cache = _TicketCache.empty()
+            # Don't re-parse a broken file until it changes again
+            self._cache_signature = signature
             print(f"Error loading ticket cache: {e}")
 
+    def _maybe_refresh(self):
+        """Reload the metadata cache whenever the training CSV changes."""
+        while True:
+            time.sleep(self.refresh_interval)
+            if self._csv_signature(TRAIN_CSV_PATH) != self._cache_signature:
+                self._load_ticket_cache(keep_previous=True)
+
+    @staticmethod
+    def _parse_training_csv(csv_path: str) -> _TicketCache:
+        """Build the metadata arrays from the training CSV."""
+        wanted = set(CATEGORY_COLUMNS) | set(TEXT_COLUMNS)
+        df = pd.read_csv(csv_path, usecols=lambda col: col in wanted)
+        
+        # Category is the first non-null value among the candidate columns
+        cat_cols = [col for col in CATEGORY_COLUMNS if col in df.columns]
+        if cat_cols:
+            categories = df[cat_cols].astype(object).bfill(axis=1).iloc[:, 0]
+            categories = categories.fillna('Unknown').astype(str)
+        else:
+            categories = pd.Series('Unknown', index=df.index)
+        
+        # Combine text for display, skipping missing columns per row
+        combined = pd.Series('', index=df.index, dtype=object)
+        for col in [col for col in TEXT_COLUMNS if col in df.columns]:
+            present = df[col].notna()
+            sep = np.where((combined != '') & present, ' | ', '')
+            combined = combined.where(~present, combined + sep + df[col].astype(str))
+        
+        codes, vocab = pd.factorize(categories, sort=True)
+        return _TicketCache(
+            id_to_row={f"ticket_{idx}": row for row, idx in enumerate(df.index)},
+            categories_vocab=[str(cat) for cat in vocab],
+            cat_codes=codes.astype(np.int16),
+            texts=combined.to_numpy(dtype=object),
+        )
+    
+    @staticmethod
+    def _read_cache_file(cache_path: str, signature: Tuple[int, int]) -> Optional[_TicketCache]:
+        """Load persisted metadata arrays if they were built from the same CSV and format."""
+        if not os.path.exists(cache_path):
+            return None
+        try:
+            with np.load(cache_path) as data:
+                if 'format' not in data.files or str(data['format']) != _cache_format_key():
+                    return None
+                if tuple(data['signature'].tolist()) != signature:
+                    return None
+                return _TicketCache(
+                    id_to_row={f"ticket_{idx}": row for row, idx in enumerate(data['row_ids'].tolist())},
+                    categories_vocab=data['categories_vocab'].tolist(),
+                    cat_codes=data['cat_codes'],
+                    texts=data['texts'].astype(object),
+                )
+        except Exception as e:
+            print(f"Ignoring unreadable ticket cache file {cache_path}: {e}")
+            return None
+    
+    @staticmethod
+    def _write_cache_file(cache_path: str, signature: Tuple[int, int], cache: _TicketCache):
+        """
+        Persist metadata arrays so later processes can skip parsing the CSV.
+        
+        Strings are stored as fixed-width unicode so the file loads without
+        pickle; compression keeps the padding off disk.
+        """
+        row_ids = np.array([int(key[len('ticket_'):]) for key in cache.id_to_row], dtype=np.int64)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.savez_compressed(
+                    f,
+                    format=np.array(_cache_format_key()),
+                    signature=np.array(signature, dtype=np.int64),
+                    row_ids=row_ids,
+                    categories_vocab=np.array(cache.categories_vocab, dtype=str),
+                    cat_codes=cache.cat_codes,
+                    texts=cache.texts.astype(str),
+                )
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"Could not write ticket cache file {cache_path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
     def classify_ticket(self, ticket_text: str) -> Dict:
         """
         Classify a support ticket.
@@ -78,7 +308,49 @@ class TicketClassifier:
         """
         # Generate embedding for the input ticket
         embedding = self.embedding_service.generate_embedding(ticket_text)
+        return self._search_and_classify(embedding)
+    
+    def classify_stream(self, texts: Iterable[str], lookahead: int = 4) -> Iterator[Dict]:
+        """
+        Classify a stream of tickets, overlapping embedding with search.
         
+        A background worker embeds up to ``lookahead`` upcoming tickets while
+        the current ticket's search is in flight.
+        
+        Args:
+            texts: The ticket texts to classify
+            lookahead: Number of tickets to embed ahead of the current one
+            
+        Yields:
+            Classification results, in input order
+        """
+        texts = iter(texts)
+        end = object()
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            for _ in range(max(lookahead, 1)):
+                text = next(texts, end)
+                if text is end:
+                    break
+                pending.append(executor.submit(self.embedding_service.generate_embedding, text))
+            
+            while pending:
+                embedding = pending.popleft().result()
+                text = next(texts, end)
+                if text is not end:
+                    pending.append(executor.submit(self.embedding_service.generate_embedding, text))
+                yield self._search_and_classify(embedding)
+    
+    def _search_and_classify(self, embedding: np.ndarray) -> Dict:
+        """
+        Search Endee with a query embedding and classify the hits.
+        
+        Args:
+            embedding: Query embedding
+            
+        Returns:
+            Dictionary with classification results
+        """
         # Search for similar tickets in Endee
         try:
             results = self.endee_client.search(
@@ -88,83 +360,124 @@ class TicketClassifier:
             )
         except Exception as e:
             print(f"Error searching Endee: {e}")
-            return {
-                'category': 'Unknown',
-                'confidence': 0.0,
-                'similar_tickets': [],
-                'error': str(e)
-            }
+            return self._error_result(str(e))
+        
+        return self._classify_results(results)
+    
+    def classify_batch(self, texts: List[str]) -> List[Dict]:
+        """
+        Classify several support tickets at once.
+        
+        Duplicate texts (after normalization) are collapsed first; the
+        distinct texts are embedded with a single batched encode call and
+        the searches are issued together through the Endee client.
+        
+        Args:
+            texts: The ticket texts to classify
+            
+        Returns:
+            List of classification results, in input order
+        """
+        if not texts:
+            return []
+        
+        # Embed and search each distinct ticket once, then scatter back
+        slots = {}
+        unique_texts = []
+        inverse = []
+        for text in texts:
+            key = self.embedding_service.text_key(text)
+            if key not in slots:
+                slots[key] = len(unique_texts)
+                unique_texts.append(text)
+            inverse.append(slots[key])
         
+        embeddings = self.embedding_service.generate_embeddings(unique_texts)
+        
+        try:
+            batch_results = self.endee_client.search_batch(
+                self.index_name,
+                embeddings,
+                top_k=self.top_k
+            )
+        except Exception as e:
+            print(f"Error searching Endee: {e}")
+            return [self._error_result(str(e)) for _ in texts]
+        
+        unique_classifications = [self._classify_results(results) for results in batch_results]
+        return [dict(unique_classifications[slot]) for slot in inverse]
+    
+    @staticmethod
+    def _error_result(error: str) -> Dict:
+        """Build the result returned when no classification could be made."""
+        return {
+            'category': 'Unknown',
+            'confidence': 0.0,
+            'similar_tickets': [],
+            'error': error
+        }
+    
+    def _classify_results(self, results: List) -> Dict:
+        """
+        Turn Endee search results into a classification by weighted voting.
+        
+        Args:
+            results: Search results for a single query
+            
+        Returns:
+            Dictionary with classification results
+        """
         if not results:
-            return {
-                'category': 'Unknown',
-                'confidence': 0.0,
-                'similar_tickets': [],
-                'error': 'No similar tickets found'
-            }
+            return self._error_result('No similar tickets found')
         
         # Extract categories from similar tickets
         # Endee MessagePack format: [distance, id, metadata_field1, metadata_field2, ...]
         # Metadata is not returned by Endee, so we look it up in our cache
-        categories = []
-        similarities = []
-        similar_tickets_info = []
-        
-        for result in results:
-            # Endee MessagePack format: [distance, id, metadata_field1, metadata_field2, ...]
-            # Based on our load script: [distance, id, combined_text, category, priority, sparse]
-            if len(result) < 2:
-                continue
-                
-            distance = result[0]  # Lower distance = more similar
-            ticket_id = result[1]
-            
-            # Lookup metadata from cache
-            cached_data = self.ticket_cache.get(ticket_id, {})
-            category = cached_data.get('category')
-            combined_text = cached_data.get('text', "")
-            
-            # Convert distance to similarity score (inverse)
-            # Cosine distance: 0 = identical, 2 = opposite
-            # Convert to similarity: 1 = identical, 0 = opposite
-            score = 1.0 - (distance / 2.0) if distance <= 2.0 else 0.0
-            
-            if category:
-                categories.append(category)
-                similarities.append(score)
-                similar_tickets_info.append({
-                    'category': category,
-                    'score': score,
-                    'distance': distance,
-                    'text': combined_text[:200]
-                })
+        cache = self._ticket_cache
+        valid = [r for r in results if len(r) >= 2 and r[1] in cache.id_to_row]
         
         # Determine final category by weighted voting
-        if not categories:
+        if not valid:
             return {
                 'category': 'Uncategorized',
                 'confidence': 0.0,
-                'similar_tickets': similar_tickets_info
+                'similar_tickets': []
             }
         
-        # Weighted voting: each category gets votes weighted by similarity score
-        category_scores = {}
-        for cat, sim in zip(categories, similarities):
-            if cat not in category_scores:
-                category_scores[cat] = 0.0
-            category_scores[cat] += sim
+        # Lower distance = more similar
+        distances = np.fromiter((r[0] for r in valid), dtype=np.float64, count=len(valid))
+        rows = np.fromiter((cache.id_to_row[r[1]] for r in valid), dtype=np.int64, count=len(valid))
+        cat_codes = cache.cat_codes[rows]
         
-        # Find category with highest weighted score
-        best_category = max(category_scores.items(), key=lambda x: x[1])
-        predicted_category = best_category[0]
+        # Convert distance to similarity score (inverse)
+        # Cosine distance: 0 = identical, 2 = opposite
+        # Convert to similarity: 1 = identical, 0 = opposite
+        scores = np.where(distances <= 2.0, 1.0 - distances / 2.0, 0.0)
         
-        # Calculate confidence as the proportion of the best category's score
-        total_score = sum(category_scores.values())
-        confidence = best_category[1] / total_score if total_score > 0 else 0.0
+        similar_tickets_info = [
+            {
+                'category': cache.categories_vocab[code],
+                'score': score,
+                'distance': distance,
+                'text': str(cache.texts[row])[:200]
+            }
+            for code, score, distance, row in zip(
+                cat_codes.tolist(), scores.tolist(), distances.tolist(), rows.tolist()
+            )
+        ]
+        
+        # Weighted voting: each category gets votes weighted by similarity score
+        best, confidence, weights, seen = _get_vote()(cat_codes, scores, len(cache.categories_vocab))
+        predicted_category = cache.categories_vocab[best]
+        
+        category_scores = {
+            cache.categories_vocab[code]: float(weights[code])
+            for code in np.flatnonzero(seen).tolist()
+        }
         
         return {
             'category': predicted_category,
-            'confidence': confidence,
+            'confidence': float(confidence),
             'similar_tickets': similar_tickets_info,
             'category_scores': category_scores
         }
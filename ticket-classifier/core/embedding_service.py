@@ -3,41 +3,312 @@ Embedding Service.
 Handles generation of vector embeddings from text using sentence-transformers.
 """
 
-from typing import List, Union
-from sentence_transformers import SentenceTransformer
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from importlib import metadata
+from typing import List, Tuple, Union
+
+import numpy as np
 from config import config
 
 
+# Inference backends accepted by SentenceTransformer(backend=...)
+SUPPORTED_BACKENDS = ('torch', 'onnx', 'openvino')
+
+# First sentence-transformers release with the onnx/openvino backends
+MIN_BACKEND_VERSION = (3, 2)
+
+
 class EmbeddingService:
     """Service for generating text embeddings."""
     
-    def __init__(self, model_name: str = None):
+    def __init__(self, model_name: str = None, cache_size: int = None, cache_precision: str = None,
+                 backend: str = None):
         """
         Initialize embedding service.
         
         Args:
             model_name: Name of the sentence-transformer model
+            cache_size: Maximum number of embeddings kept in the LRU cache
+            cache_precision: Storage format for cached embeddings ('int8' or 'float16')
+            backend: Inference backend ('torch', 'onnx' or 'openvino')
         """
         self.model_name = model_name or config.EMBEDDING_MODEL
-        print(f"Loading embedding model: {self.model_name}")
-        self.model = SentenceTransformer(self.model_name)
-        print(f"Model loaded successfully. Embedding dimension: {self.model.get_sentence_embedding_dimension()}")
+        self.backend = backend or config.EMBEDDING_BACKEND
+        self._check_backend(self.backend)
+        self.cache_size = cache_size if cache_size is not None else config.EMBEDDING_CACHE_SIZE
+        self.cache_precision = cache_precision or config.EMBEDDING_CACHE_PRECISION
+        if self.cache_precision not in ('int8', 'float16'):
+            raise ValueError(f"Unsupported cache precision: {self.cache_precision}")
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._fast_path = None
+        self._tokenizer_lock = threading.Lock()
+        
+        # Optional second-level cache shared between processes: the alias of
+        # a Django cache, e.g. one backed by Redis or Memcached
+        self.shared_cache_alias = None
+        self.shared_cache_timeout = config.EMBEDDING_SHARED_CACHE_SECONDS
+        model_tag = hashlib.blake2b(self.model_name.encode('utf-8'), digest_size=4).hexdigest()
+        self._shared_prefix = f"emb:{model_tag}:{self.cache_precision}:"
+    
+    @property
+    def model(self):
+        """The sentence-transformer model, loaded on first use."""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = self._load_model()
+        return self._model
+    
+    @staticmethod
+    def _check_backend(backend: str):
+        """
+        Fail fast on a backend the installed sentence-transformers can't load.
+        
+        Raises:
+            ValueError: If the backend is unknown, or is 'onnx'/'openvino' and
+                the installed sentence-transformers is older than 3.2
+        """
+        if backend not in SUPPORTED_BACKENDS:
+            raise ValueError(
+                f"Unsupported embedding backend: {backend} (expected one of {', '.join(SUPPORTED_BACKENDS)})"
+            )
+        if backend == 'torch':
+            return
+        try:
+            installed = metadata.version('sentence-transformers')
+        except metadata.PackageNotFoundError:
+            return  # Reported as an ImportError when the model loads
+        version = tuple(int(part) for part in re.findall(r'\d+', installed)[:2])
+        if version < MIN_BACKEND_VERSION:
+            raise ValueError(
+                f"Embedding backend '{backend}' requires sentence-transformers>=3.2, "
+                f"but {installed} is installed; use EMBEDDING_BACKEND=torch or upgrade"
+            )
+    
+    def _load_model(self):
+        """Load the sentence-transformer model and run a warmup encode."""
+        from sentence_transformers import SentenceTransformer
+        
+        kwargs = {}
+        if self.backend != 'torch':
+            # ONNX Runtime / OpenVINO backends need sentence-transformers>=3.2
+            kwargs['backend'] = self.backend
+            if config.EMBEDDING_MODEL_FILE:
+                kwargs['model_kwargs'] = {'file_name': config.EMBEDDING_MODEL_FILE}
+        
+        print(f"Loading embedding model: {self.model_name} (backend: {self.backend})")
+        model = SentenceTransformer(self.model_name, **kwargs)
+        # Warm up so the first real request doesn't pay backend lazy-init
+        model.encode(["warmup"], convert_to_numpy=True, show_progress_bar=False)
+        print(f"Model loaded successfully. Embedding dimension: {model.get_sentence_embedding_dimension()}")
+        return model
+    
+    def preload(self):
+        """Load the model now instead of on the first request."""
+        self.model
+    
+    @staticmethod
+    def text_key(text: str) -> bytes:
+        """Hash the normalized text into a compact key for caching and dedup."""
+        return hashlib.blake2b(text.strip().lower().encode(), digest_size=16).digest()
+    
+    @staticmethod
+    def quantize_int8(embedding: np.ndarray) -> Tuple[np.ndarray, float]:
+        """
+        Quantize an embedding to int8 with a symmetric per-vector scale.
+        
+        Args:
+            embedding: Float embedding vector
+            
+        Returns:
+            Tuple of (int8 codes, scale) such that codes * scale ~= embedding
+        """
+        scale = float(np.max(np.abs(embedding))) / 127.0
+        if scale == 0.0:
+            scale = 1.0
+        codes = np.round(embedding / scale).astype(np.int8)
+        return codes, scale
+    
+    @staticmethod
+    def dequantize_int8(codes: np.ndarray, scale: float) -> np.ndarray:
+        """Convert int8 codes back to a float32 embedding."""
+        return codes.astype(np.float32) * np.float32(scale)
+    
+    def _to_cache_entry(self, embedding: np.ndarray):
+        """Compress a float embedding into the configured cache precision."""
+        if self.cache_precision == 'float16':
+            return embedding.astype(np.float16)
+        return self.quantize_int8(embedding)
+    
+    def _from_cache_entry(self, entry) -> np.ndarray:
+        """Expand a cache entry back to a float32 embedding."""
+        if self.cache_precision == 'float16':
+            return entry.astype(np.float32)
+        return self.dequantize_int8(*entry)
+    
+    def _cache_lookup(self, keys: List[bytes]) -> List:
+        """Fetch cache entries for the given keys, marking hits as recently used."""
+        entries = []
+        with self._cache_lock:
+            for key in keys:
+                entry = self._cache.get(key)
+                if entry is not None:
+                    self._cache.move_to_end(key)
+                entries.append(entry)
+        return entries
+    
+    def _cache_store(self, keys: List[bytes], entries: List):
+        """Insert cache entries, evicting the least recently used ones."""
+        if self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            for key, entry in zip(keys, entries):
+                self._cache[key] = entry
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
     
-    def generate_embedding(self, text: str) -> List[float]:
+    def _shared_cache(self):
+        """
+        Resolve the shared cache backend for the calling thread.
+        
+        Django cache backends are not thread-safe, so ``caches[alias]`` is
+        looked up per call; Django keeps one backend instance per thread.
+        """
+        from django.core.cache import caches
+        return caches[self.shared_cache_alias]
+    
+    def _shared_lookup(self, keys: List[bytes]) -> dict:
+        """Fetch entries for the given keys from the shared cache, if one is set."""
+        if not self.shared_cache_alias or not keys:
+            return {}
+        names = {self._shared_prefix + key.hex(): key for key in keys}
+        try:
+            found = self._shared_cache().get_many(list(names))
+        except Exception as e:
+            print(f"Shared embedding cache lookup failed: {e}")
+            return {}
+        return {names[name]: entry for name, entry in found.items()}
+    
+    def _shared_store(self, entries: dict):
+        """Write entries to the shared cache, if one is set."""
+        if not self.shared_cache_alias or not entries:
+            return
+        try:
+            self._shared_cache().set_many(
+                {self._shared_prefix + key.hex(): entry for key, entry in entries.items()},
+                timeout=self.shared_cache_timeout
+            )
+        except Exception as e:
+            print(f"Shared embedding cache store failed: {e}")
+    
+    def _get_entries(self, texts: List[str], batch_size: int = 32) -> List:
+        """
+        Return a cache entry per text, encoding the misses in one batch.
+        
+        Lookups go to the in-process LRU first, then the shared cache; only
+        texts missing from both are encoded.
+        
+        Args:
+            texts: Input texts
+            batch_size: Batch size for encoding the cache misses
+            
+        Returns:
+            Cache entries, in input order
+        """
+        if any(not text or not text.strip() for text in texts):
+            raise ValueError("Text cannot be empty")
+        
+        keys = [self.text_key(text) for text in texts]
+        entries = self._cache_lookup(keys)
+        
+        # Encode each distinct missing text once, even if it repeats in the batch
+        missing = {}
+        for i, entry in enumerate(entries):
+            if entry is None:
+                missing.setdefault(keys[i], i)
+        
+        shared = self._shared_lookup(list(missing))
+        if shared:
+            for key in shared:
+                del missing[key]
+            self._cache_store(list(shared), list(shared.values()))
+        
+        new_entries = {}
+        if missing:
+            encoded = self.batch_generate_fast([texts[i] for i in missing.values()], batch_size=batch_size)
+            new_entries = dict(zip(missing, (self._to_cache_entry(embedding) for embedding in encoded)))
+            self._cache_store(list(new_entries), list(new_entries.values()))
+            self._shared_store(new_entries)
+        
+        resolved = {**shared, **new_entries}
+        for i, key in enumerate(keys):
+            if entries[i] is None:
+                entries[i] = resolved[key]
+        
+        return entries
+    
+    def generate_embedding_int8(self, text: str) -> Tuple[np.ndarray, float]:
+        """
+        Generate an int8-quantized embedding for a single text.
+        
+        Args:
+            text: Input text
+            
+        Returns:
+            Tuple of (int8 codes, scale)
+        """
+        entry = self._get_entries([text])[0]
+        if self.cache_precision == 'int8':
+            return entry
+        return self.quantize_int8(self._from_cache_entry(entry))
+    
+    def generate_embedding(self, text: str) -> np.ndarray:
         """
         Generate embedding for a single text.
         
+        Results are kept in an LRU cache keyed by the normalized text, so
+        repeated tickets skip the model forward pass. Entries are stored in
+        the compact cache precision and expanded on the way out, so cache
+        hits and misses return the same vector.
+        
         Args:
             text: Input text
             
         Returns:
-            Embedding vector as list of floats
+            Embedding vector as a float32 numpy array
         """
-        if not text or not text.strip():
-            raise ValueError("Text cannot be empty")
+        return self._from_cache_entry(self._get_entries([text])[0])
+    
+    def generate_embeddings(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """
+        Generate embeddings for several query texts with a single encode call.
+        
+        Cached texts are served from the LRU cache; only the misses are
+        passed to the model, together in one batch.
         
-        embedding = self.model.encode(text, convert_to_numpy=True)
-        return embedding.tolist()
+        Args:
+            texts: Input texts
+            batch_size: Batch size for encoding the cache misses
+            
+        Returns:
+            Float32 array of shape (len(texts), dimension)
+        """
+        if not texts:
+            return np.empty((0, self.get_dimension()), dtype=np.float32)
+        entries = self._get_entries(texts, batch_size=batch_size)
+        return np.stack([self._from_cache_entry(entry) for entry in entries])
+    
+    def clear_cache(self):
+        """Drop all cached embeddings."""
+        with self._cache_lock:
+            self._cache.clear()
     
     def batch_generate(self, texts: List[str], batch_size: int = 32, show_progress: bool = True) -> List[List[float]]:
         """
@@ -63,6 +334,155 @@ class EmbeddingService:
         
         return [emb.tolist() for emb in embeddings]
     
+    def _supports_fast_path(self) -> bool:
+        """Whether the model is a plain transformer + mean pooling (+ normalize) stack."""
+        if self._fast_path is None:
+            modules = list(self.model) if self.backend == 'torch' else []
+            supported = len(modules) in (2, 3) and hasattr(modules[0], 'auto_model')
+            if supported:
+                pooling = modules[1]
+                if hasattr(pooling, 'get_pooling_mode_str'):
+                    mode = pooling.get_pooling_mode_str()
+                else:
+                    mode = getattr(pooling, 'pooling_mode', None)
+                supported = mode == 'mean'
+            if supported and len(modules) == 3:
+                supported = type(modules[2]).__name__ == 'Normalize'
+            self._fast_path = supported
+        return self._fast_path
+    
+    def batch_generate_fast(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """
+        Generate embeddings by tokenizing and running the transformer directly.
+        
+        Each batch is tokenized in one call, padded to its longest member, run
+        under ``torch.inference_mode`` and mean-pooled in a single vectorized
+        step. Falls back to ``model.encode`` for models that are not a plain
+        mean-pooling stack.
+        
+        Args:
+            texts: List of input texts
+            batch_size: Batch size for encoding
+            
+        Returns:
+            Float32 array of shape (len(texts), dimension)
+        """
+        if not self._supports_fast_path():
+            return self.model.encode(
+                texts,
+                batch_size=batch_size,
+                show_progress_bar=False,
+                convert_to_numpy=True
+            )
+        
+        import torch
+        
+        model = self.model
+        transformer = model[0].auto_model
+        normalize = len(model) == 3
+        device = model.device
+        non_blocking = config.EMBEDDING_NON_BLOCKING and device.type == 'cuda'
+        
+        outputs = []
+        for start in range(0, len(texts), batch_size):
+            # Fast tokenizers are not safe to call from several threads at once
+            with self._tokenizer_lock:
+                inputs = model.tokenizer(
+                    texts[start:start + batch_size],
+                    padding='longest',
+                    truncation=True,
+                    max_length=model.max_seq_length,
+                    return_tensors='pt'
+                )
+            inputs = {name: tensor.to(device, non_blocking=non_blocking) for name, tensor in inputs.items()}
+            with torch.inference_mode():
+                token_embeddings = transformer(**inputs, return_dict=True).last_hidden_state
+                mask = inputs['attention_mask'].unsqueeze(-1).to(token_embeddings.dtype)
+                pooled = (token_embeddings * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+                if normalize:
+                    pooled = torch.nn.functional.normalize(pooled, p=2, dim=1)
+            outputs.append(pooled.float().cpu().numpy())
+        
+        if not outputs:
+            return np.empty((0, self.get_dimension()), dtype=np.float32)
+        return np.concatenate(outputs)
+    
+    def token_batches(self, texts: List[str], token_budget: int = None) -> List[np.ndarray]:
+        """
+        Group texts into batches sized by token count rather than item count.
+        
+        Texts are sorted by tokenized length and packed greedily so that each
+        padded batch (members x longest member) stays within the budget. Short
+        texts end up in large batches and long texts in small ones, which keeps
+        padding waste low without overrunning memory on long inputs.
+        
+        Args:
+            texts: List of input texts
+            token_budget: Max padded tokens per batch (defaults to config)
+            
+        Returns:
+            List of index arrays into ``texts``, in ascending length order
+        """
+        if not texts:
+            return []
+        budget = token_budget or config.EMBEDDING_TOKEN_BUDGET
+        
+        model = self.model
+        with self._tokenizer_lock:
+            input_ids = model.tokenizer(
+                list(texts),
+                truncation=True,
+                max_length=model.max_seq_length
+            )['input_ids']
+        lengths = np.fromiter((len(ids) for ids in input_ids), dtype=np.int64, count=len(input_ids))
+        order = np.argsort(lengths, kind='stable')
+        
+        batches = []
+        start = 0
+        for end in range(1, len(order) + 1):
+            # Sorted ascending, so the newest member sets the padded width
+            if end < len(order) and lengths[order[end]] * (end - start + 1) <= budget:
+                continue
+            batches.append(order[start:end])
+            start = end
+        return batches
+    
+    def batch_generate_packed(self, texts: List[str], token_budget: int = None,
+                              max_workers: int = None) -> np.ndarray:
+        """
+        Generate embeddings using token-budgeted batches (see ``token_batches``).
+        
+        Up to ``max_workers`` batches are encoded concurrently, so tokenization
+        and pooling of one batch overlap with the forward pass of another;
+        torch releases the GIL while running the model. Models without the
+        direct fast path are always encoded one batch at a time.
+        
+        Args:
+            texts: List of input texts
+            token_budget: Max padded tokens per batch (defaults to config)
+            max_workers: Max batches in flight at once (defaults to config)
+            
+        Returns:
+            Float32 array of shape (len(texts), dimension), in input order
+        """
+        workers = max_workers or config.EMBEDDING_CONCURRENCY
+        embeddings = np.empty((len(texts), self.get_dimension()), dtype=np.float32)
+        batches = self.token_batches(texts, token_budget)
+        
+        def encode(batch):
+            batch_texts = [texts[i] for i in batch]
+            return self.batch_generate_fast(batch_texts, batch_size=len(batch_texts))
+        
+        if workers <= 1 or len(batches) <= 1 or not self._supports_fast_path():
+            for batch in batches:
+                embeddings[batch] = encode(batch)
+            return embeddings
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for batch, encoded in zip(batches, executor.map(encode, batches)):
+                embeddings[batch] = encoded
+        return embeddings
+    
     def get_dimension(self) -> int:
         """
         Get the dimension of embeddings produced by this model.
@@ -5,9 +5,39 @@ Provides a Python interface for interacting with the Endee vector database.
 
 import requests
 import json
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import List, Dict, Any, Iterator, Optional, Sequence, Tuple, Union
+
+import numpy as np
 from config import config
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_default(obj):
+    """Serialize numpy values for the stdlib JSON encoder."""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_json(payload: Any) -> bytes:
+    """
+    Encode a request payload as JSON, passing numpy arrays through natively.
+    
+    Uses orjson when installed and falls back to the stdlib encoder.
+    """
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, default=_json_default).encode()
+
 
 class EndeeClient:
     """Client for Endee vector database operations."""
@@ -26,6 +56,19 @@ class EndeeClient:
         
         if self.auth_token:
             self.headers['Authorization'] = self.auth_token
+        
+        # Reuse keep-alive connections across requests instead of opening
+        # a new TCP connection per call; dropped connections are retried
+        # with exponential backoff
+        self._session = requests.Session()
+        self._session.headers.update(self.headers)
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=config.ENDEE_POOL_SIZE,
+            max_retries=Retry(total=3, backoff_factor=0.2)
+        )
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
     
     def _make_request(self, method: str, endpoint: str, **kwargs) -> requests.Response:
         """
@@ -34,7 +77,8 @@ class EndeeClient:
         Args:
             method: HTTP method (GET, POST, DELETE, etc.)
             endpoint: API endpoint
-            **kwargs: Additional arguments for requests
+            **kwargs: Additional arguments for requests; a ``json`` payload
+                is encoded with ``dumps_json``
             
         Returns:
             Response object
@@ -43,10 +87,13 @@ class EndeeClient:
             Exception: If request fails
         """
         url = f"{self.base_url}{endpoint}"
-        kwargs.setdefault('headers', {}).update(self.headers)
+        
+        if 'json' in kwargs:
+            kwargs['data'] = dumps_json(kwargs.pop('json'))
+            kwargs.setdefault('headers', {})['Content-Type'] = 'application/json'
         
         try:
-            response = requests.request(method, url, **kwargs)
+            response = self._session.request(method, url, **kwargs)
             response.raise_for_status()
             return response
         except requests.exceptions.RequestException as e:
@@ -127,13 +174,13 @@ class EndeeClient:
         print(f"Inserted {len(vectors)} vectors into '{index_name}'")
         return response.json() if response.text else {}
     
-    def search(self, index_name: str, query_vector: List[float], top_k: int = 5) -> List[Dict[str, Any]]:
+    def search(self, index_name: str, query_vector: Union[np.ndarray, Sequence[float]], top_k: int = 5) -> List[Dict[str, Any]]:
         """
         Search for similar vectors.
         
         Args:
             index_name: Name of the index
-            query_vector: Query vector
+            query_vector: Query vector (numpy array or list of floats)
             top_k: Number of results to return
             
         Returns:
@@ -142,22 +189,86 @@ class EndeeClient:
         import msgpack
         
         endpoint = f"/api/v1/index/{index_name}/search"
+        # Arrays are serialized directly by dumps_json
+        if isinstance(query_vector, np.ndarray):
+            query_vector = np.ascontiguousarray(query_vector, dtype=np.float32)
         payload = {
             "vector": query_vector,
             "k": top_k
         }
         
-        response = self._make_request('POST', endpoint, json=payload)
+        response = self._make_request('POST', endpoint, json=payload, stream=True)
         
-        # Endee returns MessagePack format
-        content_type = response.headers.get('Content-Type', '')
-        if 'msgpack' in content_type:
-            results = msgpack.unpackb(response.content)
-            return results if isinstance(results, list) else []
-        else:
-            # Fallback to JSON
-            results = response.json() if response.text else {"results": []}
-            return results.get('results', [])
+        try:
+            # Endee returns MessagePack format
+            content_type = response.headers.get('Content-Type', '')
+            if 'msgpack' in content_type:
+                # Decode results one at a time straight off the socket instead of
+                # buffering the whole body first
+                response.raw.decode_content = True
+                unpacker = msgpack.Unpacker(response.raw, raw=False, use_list=False)
+                try:
+                    count = unpacker.read_array_header()
+                except ValueError:
+                    return []
+                return [unpacker.unpack() for _ in range(count)]
+            else:
+                # Fallback to JSON
+                results = response.json() if response.text else {"results": []}
+                return results.get('results', [])
+        finally:
+            response.close()
+    
+    def search_batch(self, index_name: str, query_vectors: Union[np.ndarray, Sequence[Sequence[float]]], top_k: int = 5) -> List[List[Any]]:
+        """
+        Search for similar vectors for several queries.
+        
+        Endee has no multi-query search endpoint, so the queries are fanned
+        out concurrently over the pooled session against the single-vector
+        search API.
+        
+        Args:
+            index_name: Name of the index
+            query_vectors: Query vectors, one per row
+            top_k: Number of results to return per query
+            
+        Returns:
+            One list of search results per query vector, in input order
+        """
+        results = [None] * len(query_vectors)
+        for position, result in self.search_many(index_name, query_vectors, top_k=top_k):
+            results[position] = result
+        return results
+    
+    def search_many(self, index_name: str, query_vectors: Union[np.ndarray, Sequence[Sequence[float]]], top_k: int = 5) -> Iterator[Tuple[int, List[Any]]]:
+        """
+        Run several searches concurrently, yielding each one as it completes.
+        
+        Args:
+            index_name: Name of the index
+            query_vectors: Query vectors, one per row
+            top_k: Number of results to return per query
+            
+        Yields:
+            Tuples of (position in query_vectors, search results), in completion order
+        """
+        if len(query_vectors) <= 1:
+            for position, vector in enumerate(query_vectors):
+                yield position, self.search(index_name, vector, top_k=top_k)
+            return
+        
+        max_workers = min(len(query_vectors), config.ENDEE_POOL_SIZE)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self.search, index_name, vector, top_k): position
+                for position, vector in enumerate(query_vectors)
+            }
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+    
+    def close(self):
+        """Close pooled connections."""
+        self._session.close()
     
     def list_indexes(self) -> List[str]:
         """
@@ -47,6 +47,33 @@ class RoutingEngine:
                 'sla_hours': 48
             }
         }
+        
+        # Lowercased rule keys and a per-category memo of the matched rule
+        self._lower_keys = [(key.lower(), key) for key in self.routing_rules]
+        self._rule_cache = {}
+    
+    def _match_rule(self, category: str) -> Dict:
+        """
+        Find the routing rule whose key appears in the category (partial match).
+        
+        Args:
+            category: Predicted category
+            
+        Returns:
+            Matching routing rule, or the General rule if none match
+        """
+        rule = self._rule_cache.get(category)
+        if rule is None:
+            category_lower = category.lower()
+            rule = self.routing_rules.get('General')  # Default
+            for key_lower, key in self._lower_keys:
+                if key_lower in category_lower:
+                    rule = self.routing_rules[key]
+                    break
+            # Category cardinality is small; cap the memo in case it is not
+            if len(self._rule_cache) < 256:
+                self._rule_cache[category] = rule
+        return rule
     
     def route_ticket(self, ticket_text: str) -> Dict:
         """
@@ -66,11 +93,7 @@ class RoutingEngine:
         confidence = classification.get('confidence', 0.0)
         
         # Find matching routing rule (partial match)
-        routing_info = self.routing_rules.get('General')  # Default
-        for key, rule in self.routing_rules.items():
-            if key.lower() in category.lower():
-                routing_info = rule
-                break
+        routing_info = self._match_rule(category)
         
         return {
             'category': category,
@@ -5,6 +5,12 @@ Analyze structure, columns, categories, and data quality.
 
 import pandas as pd
 import os
+import sys
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.preprocess_data import DTYPES
 
 def explore_dataset():
     """Explore and analyze the support tickets dataset."""
@@ -19,7 +25,7 @@ def explore_dataset():
     print(f"\nLoading dataset from: {data_path}\n")
     
     # Read the CSV
-    df = pd.read_csv(data_path)
+    df = pd.read_csv(data_path, dtype=DTYPES, engine='c')
     
     # Basic information
     print("=" * 80)
@@ -45,7 +51,10 @@ def explore_dataset():
     print("\n" + "=" * 80)
     print("MISSING VALUES")
     print("=" * 80)
-    missing = df.isnull().sum()
+    # Non-null and distinct counts for every column, computed once and
+    # reused by the sections below
+    summary = df.agg(['count', 'nunique'])
+    missing = (len(df) - summary.loc['count']).astype('int64')
     missing_pct = (missing / len(df)) * 100
     missing_df = pd.DataFrame({
         'Missing Count': missing,
@@ -59,7 +68,7 @@ def explore_dataset():
     print("=" * 80)
     
     for col in df.columns:
-        unique_count = df[col].nunique()
+        unique_count = summary.loc['nunique', col]
         if unique_count < 50:  # Likely categorical
             print(f"\n{col}:")
             print(f"  Unique values: {unique_count}")
@@ -71,8 +80,8 @@ def explore_dataset():
     print("TEXT COLUMNS (Potential ticket content)")
     print("=" * 80)
     
-    for col in df.columns:
-        if df[col].dtype == 'object':
+    for col in df.select_dtypes(include=['object', 'string']).columns:
+        if pd.api.types.is_string_dtype(df[col].dtype):
             avg_length = df[col].astype(str).str.len().mean()
             if avg_length > 50:  # Likely text content
                 print(f"\n{col}:")
@@ -3,12 +3,17 @@ Load support tickets into Endee vector database.
 Generates embeddings for each ticket and inserts them into the index.
 """
 
+import numpy as np
 import pandas as pd
 import json
 import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict
 
+import requests
+
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -17,38 +22,122 @@ from core.embedding_service import get_embedding_service
 from config import config
 
 
-def combine_ticket_text(row: pd.Series) -> str:
+def combine_ticket_texts(df: pd.DataFrame) -> List[str]:
     """
-    Combine relevant fields into a single text for embedding.
+    Combine relevant fields into a single text per ticket for embedding.
     
     Args:
-        row: DataFrame row
+        df: Tickets DataFrame
         
     Returns:
-        Combined text string
+        Combined text string for each row, in row order
     """
     # Identify which columns to use (you might want to adjust this based on your dataset)
-    text_parts = []
-    
     # Common column names to combine
     possible_columns = [
         'Ticket Subject', 'Subject', 'Ticket Description', 'Description',
         'Ticket Type', 'Type', 'Issue', 'Problem', 'Question',
         'Product Purchased', 'Product', 'Category'
     ]
+    use_cols = [col for col in possible_columns if col in df.columns]
     
-    for col in possible_columns:
-        if col in row.index and pd.notna(row[col]) and str(row[col]).strip():
-            text_parts.append(str(row[col]))
+    combined = pd.Series('', index=df.index, dtype=object)
+    for col in use_cols:
+        values = df[col].astype(str).astype(object)
+        present = df[col].notna() & (values.str.strip() != '')
+        sep = np.where((combined != '') & present, ' | ', '')
+        combined = combined.where(~present, combined + sep + values)
     
     # Fallback: use all text columns if no specific ones found
-    if not text_parts:
-        for col, val in row.items():
-            if isinstance(val, str) and len(val) > 10:
-                text_parts.append(val)
+    empty = combined == ''
+    if empty.any():
+        fallback = pd.Series('', index=df.index[empty], dtype=object)
+        for col in df.columns:
+            values = df.loc[empty, col]
+            present = values.map(lambda val: isinstance(val, str) and len(val) > 10).astype(bool)
+            sep = np.where((fallback != '') & present, ' | ', '')
+            fallback = fallback.where(~present, fallback + sep + values.where(present, '').astype(object))
+        combined[empty] = fallback
     
-    combined = " | ".join(text_parts)
-    return combined if combined else "No description"
+    return combined.where(combined != '', 'No description').tolist()
+
+
+# Responses worth retrying after a pause; 413 is handled by splitting instead
+RETRY_STATUSES = (429, 502, 503, 504)
+
+
+def _insert_batch(endee_client: EndeeClient, index_name: str, batch: List[Dict],
+                  max_attempts: int, backoff: float, max_backoff: float) -> int:
+    """
+    Insert one batch, retrying transient failures and splitting rejected ones.
+    
+    Returns:
+        Number of insert requests that succeeded
+    """
+    delay = backoff
+    for attempt in range(1, max_attempts + 1):
+        try:
+            endee_client.insert_vectors(index_name, batch)
+            return 1
+        except requests.exceptions.HTTPError as e:
+            status = e.response.status_code if e.response is not None else None
+            if status != 413 and status not in RETRY_STATUSES:
+                raise
+            if status != 413 and attempt < max_attempts:
+                print(f"  Server returned {status}, retrying in {delay:.1f}s...")
+                time.sleep(delay)
+                delay = min(delay * 2, max_backoff)
+                continue
+            if status not in (413, 429) or len(batch) == 1:
+                raise
+            half = len(batch) // 2
+            print(f"  Server rejected {len(batch)} vectors ({status}), splitting into {half} + {len(batch) - half}")
+            return sum(
+                _insert_batch(endee_client, index_name, part, max_attempts, backoff, max_backoff)
+                for part in (batch[:half], batch[half:])
+            )
+
+
+def insert_vectors_batched(endee_client: EndeeClient, index_name: str, vectors: List[Dict],
+                           batch_size: int = 5000, max_workers: int = 4, max_attempts: int = 3,
+                           backoff: float = 1.0, max_backoff: float = 30.0) -> int:
+    """
+    Insert vectors in large batches, several requests at a time.
+    
+    Rate limiting (429) and gateway errors (502/503/504) are retried up to
+    ``max_attempts`` times with exponential backoff. A 413 (payload too
+    large), or a 429 that persists, splits the batch in half and inserts
+    both halves.
+    
+    Args:
+        endee_client: Endee client
+        index_name: Name of the index
+        vectors: Vector objects to insert
+        batch_size: Initial number of vectors per request
+        max_workers: Max insert requests in flight at once
+        max_attempts: Attempts per batch before giving up or splitting
+        backoff: Initial wait in seconds between retries
+        max_backoff: Upper bound on the wait between retries
+        
+    Returns:
+        Number of insert requests that succeeded
+    """
+    batches = [vectors[i:i + batch_size] for i in range(0, len(vectors), batch_size)]
+    requests_made = 0
+    inserted = 0
+    
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {
+            executor.submit(_insert_batch, endee_client, index_name, batch,
+                            max_attempts, backoff, max_backoff): len(batch)
+            for batch in batches
+        }
+        for future in as_completed(futures):
+            requests_made += future.result()
+            inserted += futures[future]
+            print(f"  Inserted {inserted}/{len(vectors)} vectors")
+    
+    return requests_made
 
 
 def load_tickets_to_endee(csv_path: str, index_name: str):
@@ -90,27 +179,30 @@ def load_tickets_to_endee(csv_path: str, index_name: str):
     
     # Generate embeddings and prepare vectors
     print("\nGenerating embeddings...")
-    texts = []
-    metadata_list = []
+    texts = combine_ticket_texts(df)
     
-    for idx, row in df.iterrows():
-        # Combine text for embedding
-        text = combine_ticket_text(row)
-        texts.append(text)
-        
-        # Prepare metadata (all columns except the text we're embedding)
-        metadata = {}
-        for col in df.columns:
-            val = row[col]
-            if pd.notna(val):
-                # Convert to string for JSON serialization
-                metadata[col] = str(val)
-        
+    # Prepare metadata: every non-null column as a string (for JSON
+    # serialization), cast column-wise and emitted as one dict per row
+    records = df.astype(str).astype(object).where(df.notna(), None).to_dict(orient='records')
+    metadata_list = []
+    for record, text in zip(records, texts):
+        metadata = {col: val for col, val in record.items() if val is not None}
         metadata['combined_text'] = text
         metadata_list.append(metadata)
     
-    print(f"Generating embeddings for {len(texts)} tickets...")
-    embeddings = embedding_service.batch_generate(texts, batch_size=32, show_progress=True)
+    # Embed each distinct text once and scatter the results back to every row
+    codes, unique_texts = pd.factorize(pd.Series(texts, dtype=object))
+    print(f"Generating embeddings for {len(texts)} tickets ({len(unique_texts)} unique texts)...")
+    unique_embeddings = embedding_service.batch_generate_packed(
+        list(unique_texts),
+        token_budget=config.EMBEDDING_TOKEN_BUDGET,
+        max_workers=config.EMBEDDING_CONCURRENCY
+    )
+    embeddings = unique_embeddings[codes]
+    
+    # Endee quantizes stored vectors itself (int8 by default), so digits
+    # beyond its quantization step only inflate the JSON payload
+    embeddings = np.round(embeddings, config.ENDEE_VECTOR_DECIMALS)
     
     # Prepare vectors for insertion
     print("\nPreparing vectors for insertion...")
@@ -125,11 +217,13 @@ def load_tickets_to_endee(csv_path: str, index_name: str):
     
     # Insert in batches
     print(f"\nInserting {len(vectors)} vectors into Endee...")
-    batch_size = 100
-    for i in range(0, len(vectors), batch_size):
-        batch = vectors[i:i+batch_size]
-        endee_client.insert_vectors(index_name, batch)
-        print(f"  Inserted batch {i//batch_size + 1}/{(len(vectors)-1)//batch_size + 1}")
+    insert_vectors_batched(
+        endee_client,
+        index_name,
+        vectors,
+        batch_size=config.ENDEE_INSERT_BATCH_SIZE,
+        max_workers=config.ENDEE_INSERT_WORKERS
+    )
     
     # Verify
     print("\nVerifying insertion...")
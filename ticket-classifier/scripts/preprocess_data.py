@@ -2,11 +2,42 @@
 Preprocess customer support tickets and prepare for vector database loading.
 """
 
+import numpy as np
 import pandas as pd
 import os
 import json
+import hashlib
 from typing import List, Dict, Tuple
 
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+
+# Explicit column dtypes for the raw tickets CSV. Low-cardinality fields are
+# read as categoricals and free text as pandas strings, which skips per-cell
+# type inference and keeps the frame much smaller than object columns.
+DTYPES = {
+    'Ticket ID': 'Int64',
+    'Customer Name': 'string',
+    'Customer Email': 'string',
+    'Customer Age': 'Int64',
+    'Customer Gender': 'category',
+    'Product Purchased': 'category',
+    'Date of Purchase': 'string',
+    'Ticket Type': 'category',
+    'Ticket Subject': 'string',
+    'Ticket Description': 'string',
+    'Ticket Status': 'category',
+    'Resolution': 'string',
+    'Ticket Priority': 'category',
+    'Ticket Channel': 'category',
+    'First Response Time': 'string',
+    'Time to Resolution': 'string',
+    'Customer Satisfaction Rating': 'float64',
+}
+
 def load_and_clean_data():
     """Load and clean the support tickets dataset."""
     # Load dataset
@@ -15,7 +46,7 @@ def load_and_clean_data():
     data_path = os.path.join(project_dir, 'data', 'raw', 'customer_support_tickets.csv')
     
     print(f"Loading dataset from: {data_path}")
-    df = pd.read_csv(data_path)
+    df = pd.read_csv(data_path, dtype=DTYPES, engine='c')
     
     print(f"Loaded {len(df)} tickets")
     print(f"Columns: {list(df.columns)}")
@@ -29,10 +60,15 @@ def load_and_clean_data():
     print(f"Removed {initial_count - len(df)} tickets with missing Ticket ID")
     
     # Fill missing values in text fields with empty string
-    text_columns = df.select_dtypes(include=['object']).columns
+    text_columns = df.select_dtypes(include=['object', 'string']).columns
     for col in text_columns:
         df[col] = df[col].fillna('')
     
+    # Categoricals only accept known values, so register '' before filling
+    for col in df.select_dtypes(include=['category']).columns:
+        if df[col].isna().any():
+            df[col] = df[col].cat.add_categories('').fillna('')
+    
     print(f"\nFinal dataset size: {len(df)} tickets")
     
     return df
@@ -51,13 +87,14 @@ def prepare_training_data(df: pd.DataFrame, train_ratio: float = 0.8) -> Tuple[p
     """
     print(f"\nSplitting data: {train_ratio*100:.0f}% train, {(1-train_ratio)*100:.0f}% test")
     
-   # Shuffle the data
-    df = df.sample(frac=1, random_state=42).reset_index(drop=True)
+    # Shuffle row positions instead of the frame itself; the legacy seeded
+    # generator yields the same order as df.sample(frac=1, random_state=42)
+    perm = np.random.RandomState(42).permutation(len(df))
     
-    # Split
+    # Split by gathering each side straight into its own frame
     split_idx = int(len(df) * train_ratio)
-    train_df = df.iloc[:split_idx]
-    test_df = df.iloc[split_idx:]
+    train_df = df.take(perm[:split_idx])
+    test_df = df.take(perm[split_idx:])
     
     print(f"Train set: {len(train_df)} tickets")
     print(f"Test set: {len(test_df)} tickets")
@@ -65,8 +102,56 @@ def prepare_training_data(df: pd.DataFrame, train_ratio: float = 0.8) -> Tuple[p
     return train_df, test_df
 
 
+def write_csv(df: pd.DataFrame, path: str):
+    """
+    Write a dataframe to CSV, using pyarrow's multithreaded writer if available.
+    
+    The file is written next to ``path`` and moved into place, so readers
+    never see a partially written CSV.
+    
+    Args:
+        df: Dataframe to write
+        path: Destination CSV path
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        if pa is None:
+            df.to_csv(tmp_path, index=False)
+        else:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            pa_csv.write_csv(table, tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def dataset_signature(train_df: pd.DataFrame, test_df: pd.DataFrame) -> str:
+    """
+    Compute a content hash of the train/test split.
+    
+    Args:
+        train_df: Training set
+        test_df: Test set
+        
+    Returns:
+        Hex digest covering the column names and every row, in order
+    """
+    digest = hashlib.sha256()
+    for df in (train_df, test_df):
+        digest.update('\x1f'.join(map(str, df.columns)).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return digest.hexdigest()
+
+
 def save_processed_data(train_df: pd.DataFrame, test_df: pd.DataFrame):
-    """Save processed data to CSV files."""
+    """
+    Save processed data to CSV files.
+    
+    Writing is skipped when ``dataset_info.json`` records the same split
+    signature and both CSVs are present, which also leaves their mtimes
+    (and the classifier's metadata cache) untouched.
+    """
     script_dir = os.path.dirname(os.path.abspath(__file__))
     project_dir = os.path.dirname(script_dir)
     processed_dir = os.path.join(project_dir, 'data', 'processed')
@@ -75,9 +160,23 @@ def save_processed_data(train_df: pd.DataFrame, test_df: pd.DataFrame):
     
     train_path = os.path.join(processed_dir, 'train.csv')
     test_path = os.path.join(processed_dir, 'test.csv')
+    info_path = os.path.join(processed_dir, 'dataset_info.json')
     
-    train_df.to_csv(train_path, index=False)
-    test_df.to_csv(test_path, index=False)
+    signature = dataset_signature(train_df, test_df)
+    if os.path.exists(train_path) and os.path.exists(test_path) and os.path.exists(info_path):
+        try:
+            with open(info_path) as f:
+                previous = json.load(f).get('signature')
+        except (OSError, ValueError):
+            previous = None
+        if previous == signature:
+            print("\nProcessed data is up to date, skipping writes")
+            print(f"  Train: {train_path}")
+            print(f"  Test: {test_path}")
+            return
+    
+    write_csv(train_df, train_path)
+    write_csv(test_df, test_path)
     
     print(f"\nSaved processed data:")
     print(f"  Train: {train_path}")
@@ -89,9 +188,9 @@ def save_processed_data(train_df: pd.DataFrame, test_df: pd.DataFrame):
         'train_count': len(train_df),
         'test_count': len(test_df),
         'columns': list(train_df.columns),
+        'signature': signature,
     }
     
-    info_path = os.path.join(processed_dir, 'dataset_info.json')
     with open(info_path, 'w') as f:
         json.dump(info, f, indent=2)
     
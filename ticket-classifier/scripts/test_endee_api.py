@@ -2,19 +2,32 @@
 Test Endee API endpoints to verify connectivity and correct usage.
 """
 
+import os
+import sys
+
 import requests
-import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.endee_client import dumps_json
 
 # Test base URL
 base_url = "http://localhost:8080"
 
+# Shared keep-alive session so the probes reuse one connection
+SESSION = requests.Session()
+SESSION.mount('http://', HTTPAdapter(pool_maxsize=32, max_retries=Retry(total=3, backoff_factor=0.2)))
+
 print("Testing Endee API Endpoints")
 print("=" * 80)
 
 # 1. Test health/root endpoint
 print("\n1. Testing root endpoint...")
 try:
-    r = requests.get(f"{base_url}/")
+    r = SESSION.get(f"{base_url}/")
     print(f"   Status: {r.status_code}")
 except Exception as e:
     print(f"   Error: {e}")
@@ -22,7 +35,7 @@ except Exception as e:
 # 2. List indexes
 print("\n2. Listing indexes...")
 try:
-    r = requests.get(f"{base_url}/api/v1/index/list")
+    r = SESSION.get(f"{base_url}/api/v1/index/list")
     print(f"   Status: {r.status_code}")
     print(f"   Response: {r.text}")
 except Exception as e:
@@ -35,10 +48,10 @@ try:
         "dimension": 384,
         "metric": "cosine"
     }
-    r = requests.post(
+    r = SESSION.post(
         f"{base_url}/api/v1/index/test_index",
-        json=payload,
-        headers={"Content-Type": "application/json"}  
+        data=dumps_json(payload),
+        headers={"Content-Type": "application/json"}
     )
     print(f"   Status: {r.status_code}")
     print(f"   Response: {r.text if r.text else 'No content'}")
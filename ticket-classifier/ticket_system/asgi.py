@@ -14,3 +14,7 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ticket_system.settings')
 
 application = get_asgi_application()
+
+from ticket_system.startup import configure_services
+
+configure_services()
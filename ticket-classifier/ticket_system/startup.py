@@ -0,0 +1,26 @@
+"""
+Process startup hooks shared by the WSGI and ASGI entry points.
+"""
+
+from config import config
+
+
+def configure_services():
+    """
+    Apply startup-time service settings once Django is set up.
+    
+    Points the embedding service at the shared Django cache, if one is
+    configured, and optionally loads the embedding model and builds the
+    classifier (metadata cache, and the Numba import and compile of the
+    vote kernel) at worker startup instead of on the first classification
+    request.
+    """
+    if config.EMBEDDING_SHARED_CACHE:
+        from core.embedding_service import get_embedding_service
+        get_embedding_service().shared_cache_alias = config.EMBEDDING_SHARED_CACHE
+    
+    if config.PRELOAD_EMBEDDING_MODEL:
+        from core.embedding_service import get_embedding_service
+        from core.classifier import get_classifier
+        get_embedding_service().preload()
+        get_classifier()
@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ticket_system.settings')
 
 application = get_wsgi_application()
+
+from ticket_system.startup import configure_services
+
+configure_services()
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-14 04:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0002_ticket_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ticket',
+            name='customer_email',
+            field=models.EmailField(blank=True, db_index=True, max_length=254),
+        ),
+    ]
@@ -41,22 +41,22 @@ class Ticket(models.Model):
     # Basic fields
     ticket_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     customer_name = models.CharField(max_length=200)
-    customer_email = models.EmailField(blank=True)
+    customer_email = models.EmailField(blank=True, db_index=True)
     subject = models.CharField(max_length=300)
     description = models.TextField()
     
     # Classification fields
-    predicted_category = models.CharField(max_length=100)
+    predicted_category = models.CharField(max_length=100, db_index=True)
     confidence_score = models.FloatField(default=0.0)
     
     # Routing fields
     department = models.CharField(max_length=100, blank=True)
-    priority = models.CharField(max_length=20, choices=PRIORITY_CHOICES, default='medium')
+    priority = models.CharField(max_length=20, choices=PRIORITY_CHOICES, default='medium', db_index=True)
     sla_hours = models.IntegerField(default=24)
     
     # Status fields
-    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='new')
-    created_at = models.DateTimeField(default=timezone.now)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='new', db_index=True)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     # Additional metadata
@@ -64,6 +64,51 @@ class Ticket(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'priority']),
+        ]
     
     def __str__(self):
         return f"{self.subject} - {self.predicted_category}"
+    
+    @classmethod
+    def bulk_ingest(cls, rows, batch_size: int = 1000):
+        """
+        Insert many tickets using multi-row INSERTs instead of one per ticket.
+        
+        ``save()`` and model signals are skipped, but every row is validated
+        with ``full_clean()`` first, so a bad row raises ``ValidationError``
+        before anything is written. Give each row its own ``created_at`` when
+        back-loading historical tickets; rows without one share the ingest
+        time. Rows whose ``ticket_id`` is already stored are left out, so
+        re-running an ingest is safe; a ``ticket_id`` repeated within
+        ``rows`` is inserted once, from its first row.
+        
+        Args:
+            rows: Iterable of dicts mapping Ticket field names to values
+            batch_size: Number of rows per INSERT statement
+            
+        Returns:
+            List of the Ticket instances that were inserted
+        """
+        now = timezone.now()
+        tickets = [cls(**{'created_at': now, **row}) for row in rows]
+        for ticket in tickets:
+            # Uniqueness is handled below with a single query
+            ticket.full_clean(validate_unique=False)
+        
+        # Keep the first row per ticket_id; full_clean() has normalised the ids
+        unique = {}
+        for ticket in tickets:
+            unique.setdefault(ticket.pk, ticket)
+        tickets = list(unique.values())
+        
+        # Look up already-stored ids in chunks to stay under parameter limits
+        ids = [ticket.pk for ticket in tickets]
+        existing = set()
+        for start in range(0, len(ids), batch_size):
+            existing.update(
+                cls.objects.filter(pk__in=ids[start:start + batch_size]).values_list('pk', flat=True)
+            )
+        tickets = [ticket for ticket in tickets if ticket.pk not in existing]
+        return cls.objects.bulk_create(tickets, batch_size=batch_size)
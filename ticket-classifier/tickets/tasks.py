@@ -0,0 +1,76 @@
+"""
+Background classification jobs for submitted tickets.
+Runs routing off the request thread so submissions return immediately.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from config import config
+from .models import Ticket
+
+# Category stored on a ticket until its background classification finishes
+PENDING_CATEGORY = 'pending'
+
+_executor = ThreadPoolExecutor(
+    max_workers=config.CLASSIFICATION_WORKERS,
+    thread_name_prefix='classify'
+)
+
+
+def combine_ticket_text(subject: str, description: str) -> str:
+    """Combine subject and description into the text used for classification."""
+    return f"{subject} | {description}"
+
+
+def classify_ticket(ticket_id):
+    """
+    Classify and route a stored ticket, then save the results on its row.
+    
+    Args:
+        ticket_id: Primary key of the ticket to classify
+    """
+    from core.routing_engine import get_routing_engine
+    
+    try:
+        ticket = Ticket.objects.only('subject', 'description').get(pk=ticket_id)
+        routing_result = get_routing_engine().route_ticket(
+            combine_ticket_text(ticket.subject, ticket.description)
+        )
+        Ticket.objects.filter(pk=ticket_id).update(
+            predicted_category=routing_result.get('category', 'Unknown'),
+            confidence_score=routing_result.get('confidence', 0.0),
+            department=routing_result.get('department', 'General Support'),
+            priority=routing_result.get('priority', 'medium'),
+            sla_hours=routing_result.get('sla_hours', 24),
+            updated_at=timezone.now()
+        )
+    except Exception as e:
+        print(f"Error classifying ticket {ticket_id}: {e}")
+        # Don't leave the ticket pending forever; store the same fallbacks as the sync path
+        try:
+            Ticket.objects.filter(pk=ticket_id).update(
+                predicted_category='Unknown',
+                confidence_score=0.0,
+                department='General Support',
+                priority='medium',
+                sla_hours=24,
+                updated_at=timezone.now()
+            )
+        except Exception as e:
+            print(f"Error saving fallback classification for ticket {ticket_id}: {e}")
+    finally:
+        # Worker threads hold their own DB connection; release it per job
+        connection.close()
+
+
+def enqueue_classification(ticket_id):
+    """
+    Schedule background classification once the ticket row is committed.
+    
+    Args:
+        ticket_id: Primary key of the ticket to classify
+    """
+    transaction.on_commit(lambda: _executor.submit(classify_ticket, ticket_id))
@@ -1,3 +1,219 @@
+import re
+import uuid
+from unittest import mock
+
+from django.core.exceptions import ValidationError
 from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from .models import Ticket
+from .serializers import EMAIL_PATTERN, TicketSubmissionSerializer
+from .tasks import PENDING_CATEGORY, classify_ticket
+
+SUBMIT_URL = '/api/tickets/submit/'
+
+TICKET_DATA = {
+    'customer_name': 'John Doe',
+    'customer_email': 'john@example.com',
+    'subject': 'Cannot access my account',
+    'description': "I forgot my password and the reset email isn't arriving",
+}
+
+ROUTING_RESULT = {
+    'category': 'Account Access',
+    'confidence': 0.85,
+    'department': 'Account Services',
+    'priority': 'high',
+    'sla_hours': 2,
+}
+
+
+class StubRoutingEngine:
+    """Routing engine that returns a fixed result without touching Endee."""
+    
+    def __init__(self, result=None, error=None):
+        self.result = result or ROUTING_RESULT
+        self.error = error
+        self.texts = []
+    
+    def route_ticket(self, ticket_text):
+        self.texts.append(ticket_text)
+        if self.error:
+            raise self.error
+        return dict(self.result)
+
+
+class SubmitTicketTests(APITestCase):
+    def setUp(self):
+        self.engine = StubRoutingEngine()
+        patcher = mock.patch('tickets.views.get_routing_engine', return_value=self.engine)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    @mock.patch('tickets.views.enqueue_classification')
+    def test_submit_defaults_to_pending(self, enqueue):
+        response = self.client.post(SUBMIT_URL, TICKET_DATA, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['classification'], {'status': 'pending'})
+        self.assertEqual(
+            set(response.data['ticket']),
+            {'ticket_id', 'subject', 'status', 'created_at'}
+        )
+        ticket = Ticket.objects.get()
+        self.assertEqual(ticket.predicted_category, PENDING_CATEGORY)
+        self.assertEqual(response.data['ticket']['ticket_id'], str(ticket.ticket_id))
+        enqueue.assert_called_once_with(ticket.ticket_id)
+        self.assertEqual(self.engine.texts, [])
+    
+    @mock.patch('tickets.views.enqueue_classification')
+    def test_submit_sync_classifies_inline(self, enqueue):
+        response = self.client.post(SUBMIT_URL + '?sync=1', TICKET_DATA, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['classification'], ROUTING_RESULT)
+        ticket = Ticket.objects.get()
+        self.assertEqual(ticket.predicted_category, 'Account Access')
+        self.assertEqual(ticket.department, 'Account Services')
+        self.assertEqual(ticket.sla_hours, 2)
+        enqueue.assert_not_called()
+        self.assertEqual(
+            self.engine.texts,
+            [f"{TICKET_DATA['subject']} | {TICKET_DATA['description']}"]
+        )
+
+
+# classify_ticket closes the worker's connection; keep the test transaction open
+@mock.patch('tickets.tasks.connection')
+class ClassifyTicketTests(APITestCase):
+    def submit_pending_ticket(self):
+        with mock.patch('tickets.views.get_routing_engine', return_value=StubRoutingEngine()), \
+                mock.patch('tickets.views.enqueue_classification'):
+            response = self.client.post(SUBMIT_URL, TICKET_DATA, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        return response.data['ticket']['ticket_id']
+    
+    def test_pending_ticket_is_classified(self, connection):
+        ticket_id = self.submit_pending_ticket()
+        
+        with mock.patch('core.routing_engine.get_routing_engine', return_value=StubRoutingEngine()):
+            classify_ticket(ticket_id)
+        
+        ticket = Ticket.objects.get(pk=ticket_id)
+        self.assertEqual(ticket.predicted_category, 'Account Access')
+        self.assertEqual(ticket.confidence_score, 0.85)
+        self.assertEqual(ticket.department, 'Account Services')
+        self.assertEqual(ticket.priority, 'high')
+        self.assertEqual(ticket.sla_hours, 2)
+        connection.close.assert_called_once_with()
+    
+    def test_failed_classification_is_not_left_pending(self, connection):
+        ticket_id = self.submit_pending_ticket()
+        engine = StubRoutingEngine(error=RuntimeError('Endee unavailable'))
+        
+        with mock.patch('core.routing_engine.get_routing_engine', return_value=engine):
+            classify_ticket(ticket_id)
+        
+        ticket = Ticket.objects.get(pk=ticket_id)
+        self.assertEqual(ticket.predicted_category, 'Unknown')
+        self.assertEqual(ticket.confidence_score, 0.0)
+        self.assertEqual(ticket.department, 'General Support')
+        self.assertEqual(ticket.priority, 'medium')
+        self.assertEqual(ticket.sla_hours, 24)
+
+
+def ingest_row(**fields):
+    """Build a valid bulk_ingest row, overriding any field."""
+    row = {
+        'ticket_id': uuid.uuid4(),
+        'customer_name': 'Jane Roe',
+        'subject': 'Refund request',
+        'description': 'I was charged twice for my order',
+        'predicted_category': 'Billing',
+    }
+    row.update(fields)
+    return row
+
+
+class BulkIngestTests(TestCase):
+    def test_inserts_valid_rows(self):
+        rows = [ingest_row() for _ in range(5)]
+        
+        inserted = Ticket.bulk_ingest(rows, batch_size=2)
+        
+        self.assertEqual(len(inserted), 5)
+        self.assertEqual(
+            set(Ticket.objects.values_list('ticket_id', flat=True)),
+            {row['ticket_id'] for row in rows}
+        )
+    
+    def test_skips_stored_ticket_ids(self):
+        stored = ingest_row(subject='Original subject')
+        Ticket.bulk_ingest([stored])
+        new = ingest_row()
+        
+        inserted = Ticket.bulk_ingest([ingest_row(ticket_id=str(stored['ticket_id'])), new])
+        
+        self.assertEqual([ticket.pk for ticket in inserted], [new['ticket_id']])
+        self.assertEqual(Ticket.objects.count(), 2)
+        self.assertEqual(Ticket.objects.get(pk=stored['ticket_id']).subject, 'Original subject')
+    
+    def test_repeated_ticket_id_keeps_first_row(self):
+        ticket_id = uuid.uuid4()
+        
+        inserted = Ticket.bulk_ingest([
+            ingest_row(ticket_id=ticket_id, subject='First'),
+            ingest_row(ticket_id=str(ticket_id), subject='Second'),
+        ])
+        
+        self.assertEqual(len(inserted), 1)
+        self.assertEqual(Ticket.objects.get().subject, 'First')
+    
+    def test_invalid_row_writes_nothing(self):
+        rows = [ingest_row(), ingest_row(customer_email='not-an-email'), ingest_row()]
+        
+        with self.assertRaises(ValidationError):
+            Ticket.bulk_ingest(rows)
+        
+        self.assertFalse(Ticket.objects.exists())
+
 
-# Create your tests here.
+class EmailPatternTests(TestCase):
+    VALID = [
+        'a@b.co',
+        'john@example.com',
+        'John.Doe+tickets@mail.example.org',
+        "o'brien@sub-domain.example.co.uk",
+        'user@xn--bcher-kva.xn--p1ai',
+    ]
+    INVALID = [
+        'a@b.c',
+        'a@b..com',
+        'a@.b.com',
+        'a"b@c.de',
+        '.a@b.com',
+        'a..b@c.com',
+        'a@-b.com',
+        'a@b.com\n',
+        'plainaddress',
+    ]
+    
+    def test_accepts_valid_addresses(self):
+        for email in self.VALID:
+            with self.subTest(email=email):
+                self.assertIsNotNone(re.match(EMAIL_PATTERN, email))
+    
+    def test_rejects_invalid_addresses(self):
+        for email in self.INVALID:
+            with self.subTest(email=email):
+                self.assertIsNone(re.match(EMAIL_PATTERN, email))
+    
+    def test_serializer_validates_email(self):
+        data = {key: value for key, value in TICKET_DATA.items() if key != 'customer_email'}
+        self.assertTrue(TicketSubmissionSerializer(data={**data, 'customer_email': ''}).is_valid())
+        self.assertTrue(TicketSubmissionSerializer(data=data).is_valid())
+        
+        serializer = TicketSubmissionSerializer(data={**data, 'customer_email': 'a@b..com'})
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors['customer_email'], ['Enter a valid email address.'])
@@ -11,16 +11,46 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.core.cache import cache
 from django.shortcuts import render
 
 from .models import Ticket, Category
 from .serializers import TicketSerializer, CategorySerializer, TicketSubmissionSerializer
+from .tasks import PENDING_CATEGORY, combine_ticket_text, enqueue_classification
 
 try:
     from core.routing_engine import get_routing_engine
 except ImportError:
     get_routing_engine = None
 
+# Cached ticket count shown on the dashboard
+TICKET_COUNT_CACHE_KEY = 'ticket_count'
+TICKET_COUNT_CACHE_SECONDS = 30
+
+# Columns rendered in the dashboard's latest-tickets table
+DASHBOARD_FIELDS = (
+    'ticket_id', 'subject', 'predicted_category', 'confidence_score',
+    'priority', 'status', 'created_at',
+)
+
+
+def ticket_summary(ticket: Ticket) -> dict:
+    """
+    Build the short ticket representation returned by the submit endpoint.
+    
+    Args:
+        ticket: Newly created ticket
+        
+    Returns:
+        Dict with the ticket's id, subject, status and creation time
+    """
+    return {
+        'ticket_id': str(ticket.ticket_id),
+        'subject': ticket.subject,
+        'status': ticket.status,
+        'created_at': ticket.created_at.isoformat(),
+    }
+
 
 class TicketViewSet(viewsets.ModelViewSet):
     """ViewSet for managing tickets."""
@@ -31,6 +61,10 @@ class TicketViewSet(viewsets.ModelViewSet):
     def submit(self, request):
         """
         Submit a new ticket for classification and routing.
+        
+        The ticket is stored as pending and classified in the background;
+        the response is 202 Accepted. Pass ``?sync=1`` to classify inline
+        and get the routing result back in the response.
         """
         # Validate input
         submission_serializer = TicketSubmissionSerializer(data=request.data)
@@ -43,10 +77,29 @@ class TicketViewSet(viewsets.ModelViewSet):
         data = submission_serializer.validated_data
         
         # Combine subject and description for classification
-        ticket_text = f"{data['subject']} | {data['description']}"
+        ticket_text = combine_ticket_text(data['subject'], data['description'])
+        sync = request.query_params.get('sync', '').lower() in ('1', 'true')
         
         # Classify and route the ticket
         try:
+            if get_routing_engine and not sync:
+                # Persist now and classify off the request thread
+                ticket = Ticket.objects.create(
+                    customer_name=data['customer_name'],
+                    customer_email=data.get('customer_email', ''),
+                    subject=data['subject'],
+                    description=data['description'],
+                    predicted_category=PENDING_CATEGORY
+                )
+                enqueue_classification(ticket.ticket_id)
+                cache.delete(TICKET_COUNT_CACHE_KEY)
+                
+                response_data = {
+                    'ticket': ticket_summary(ticket),
+                    'classification': {'status': PENDING_CATEGORY}
+                }
+                return Response(response_data, status=status.HTTP_202_ACCEPTED)
+            
             if get_routing_engine:
                 routing_engine = get_routing_engine()
                 routing_result = routing_engine.route_ticket(ticket_text)
@@ -66,7 +119,7 @@ class TicketViewSet(viewsets.ModelViewSet):
                 
                 # Prepare response
                 response_data = {
-                    'ticket': TicketSerializer(ticket).data,
+                    'ticket': ticket_summary(ticket),
                     'classification': {
                         'category': routing_result.get('category'),
                         'confidence': routing_result.get('confidence'),
@@ -89,7 +142,7 @@ class TicketViewSet(viewsets.ModelViewSet):
                     sla_hours=24
                 )
                 response_data = {
-                    'ticket': TicketSerializer(ticket).data,
+                    'ticket': ticket_summary(ticket),
                     'classification': {
                         'category': 'General',
                         'confidence': 0.0,
@@ -98,6 +151,7 @@ class TicketViewSet(viewsets.ModelViewSet):
                     }
                 }
             
+            cache.delete(TICKET_COUNT_CACHE_KEY)
             return Response(response_data, status=status.HTTP_201_CREATED)
             
         except Exception as e:
@@ -120,9 +174,12 @@ def submit_ticket_view(request):
 
 def dashboard_view(request):
     """Dashboard view for monitoring tickets."""
-    tickets = Ticket.objects.all()[:10]  # Latest 10 tickets
+    # Latest 10 tickets, fetching only the columns the table renders
+    tickets = list(Ticket.objects.only(*DASHBOARD_FIELDS).order_by('-created_at')[:10])
     context = {
         'tickets': tickets,
-        'total_tickets': Ticket.objects.count(),
+        'total_tickets': cache.get_or_set(
+            TICKET_COUNT_CACHE_KEY, Ticket.objects.count, TICKET_COUNT_CACHE_SECONDS
+        ),
     }
     return render(request, 'tickets/dashboard.html', context)